@@ -1,8 +1,14 @@
 """Download required model files for gender and age detection."""
 import os
-import urllib.request
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # Model URLs
 MODELS = {
     "opencv_face_detector.pbtxt": "https://raw.githubusercontent.com/opencv/opencv/master/samples/dnn/face_detector/opencv_face_detector.pbtxt",
@@ -13,15 +19,80 @@ MODELS = {
     "gender_net.caffemodel": "https://www.dropbox.com/s/iyv483wz7ztr9gh/gender_net.caffemodel?dl=1"
 }
 
-def download_file(url: str, destination: Path):
-    """Download a file from URL to destination."""
-    print(f"📥 Downloading {destination.name}...")
+# Serializes progress output from the download workers
+_print_lock = threading.Lock()
+
+
+def _log(message: str):
+    """Print a message without interleaving output from other threads."""
+    with _print_lock:
+        print(message)
+
+
+def create_session() -> requests.Session:
+    """Create a pooled HTTP session with retries."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _content_length(http, url: str, headers: dict):
+    """Size of the file at url from a HEAD request, or None if unknown."""
     try:
-        urllib.request.urlretrieve(url, destination)
-        print(f"✅ Downloaded {destination.name}")
+        head = http.head(url, headers=headers, allow_redirects=True, timeout=30)
+        head.raise_for_status()
+        return int(head.headers.get("Content-Length", 0)) or None
+    except (requests.RequestException, ValueError):
+        # Some servers reject HEAD (405/403); download without resuming
+        return None
+
+
+def download_file(url: str, destination: Path, session: requests.Session = None):
+    """
+    Download a file from URL to destination.
+    
+    Data is streamed to a ".part" file that is renamed once complete, so an
+    interrupted download resumes with an HTTP Range request next time.
+    """
+    http = session or requests
+    partial = destination.with_name(destination.name + ".part")
+    # Byte offsets must refer to the file itself, not a compressed transfer
+    headers = {"Accept-Encoding": "identity"}
+    try:
+        total = _content_length(http, url, headers)
+        
+        # Without a known size a partial file can't be verified, so restart
+        pos = partial.stat().st_size if partial.exists() else 0
+        if total is None or pos > total:
+            pos = 0
+        
+        if total is None or pos < total:
+            if pos:
+                _log(f"📥 Resuming {destination.name} at {pos}/{total} bytes...")
+                headers["Range"] = f"bytes={pos}-"
+            else:
+                _log(f"📥 Downloading {destination.name}...")
+            
+            with http.get(url, headers=headers, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                # Server ignored the range and sent the whole file
+                if pos and response.status_code != 206:
+                    pos = 0
+                with partial.open("ab" if pos else "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 20)
+        
+        size = partial.stat().st_size
+        if total is not None and size != total:
+            raise IOError(f"incomplete download ({size}/{total} bytes), run again to resume")
+        
+        partial.replace(destination)
+        _log(f"✅ Downloaded {destination.name}")
         return True
     except Exception as e:
-        print(f"❌ Failed to download {destination.name}: {str(e)}")
+        _log(f"❌ Failed to download {destination.name}: {str(e)}")
         return False
 
 def main():
@@ -36,6 +107,7 @@ def main():
     success_count = 0
     total_count = len(MODELS)
     
+    pending = {}
     for filename, url in MODELS.items():
         destination = models_dir / filename
         
@@ -45,8 +117,18 @@ def main():
             success_count += 1
             continue
         
-        if download_file(url, destination):
-            success_count += 1
+        pending[filename] = url
+    
+    # Download the remaining files in parallel
+    if pending:
+        with create_session() as session, ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {
+                executor.submit(download_file, url, models_dir / filename, session): filename
+                for filename, url in pending.items()
+            }
+            for future in as_completed(futures):
+                if future.result():
+                    success_count += 1
     
     print("=" * 60)
     print(f"✅ Download complete: {success_count}/{total_count} files")
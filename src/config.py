@@ -1,6 +1,7 @@
 """Configuration settings for the application."""
 import os
 from pathlib import Path
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
@@ -12,6 +13,9 @@ class Settings(BaseSettings):
     app_version: str = "1.0.0"
     debug: bool = False
     
+    # Load models when src.main is imported (for gunicorn --preload)
+    preload_models: bool = False
+    
     # Model paths
     models_dir: Path = Path("models")
     face_proto: Path = models_dir / "opencv_face_detector.pbtxt"
@@ -20,11 +24,24 @@ class Settings(BaseSettings):
     age_model: Path = models_dir / "age_net.caffemodel"
     gender_proto: Path = models_dir / "gender_deploy.prototxt"
     gender_model: Path = models_dir / "gender_net.caffemodel"
+    embed_model: Path = models_dir / "mobilefacenet.onnx"
+    
+    # OpenCV worker threads, 0 splits the CPU cores between WEB_CONCURRENCY workers
+    opencv_threads: int = 0
+    
+    # DNN backend: "auto", "cuda", "cuda_fp16", "openvino" or "cpu"
+    dnn_backend: str = "auto"
     
     # Detection settings
     face_conf_threshold: float = 0.5
     padding: int = 20
     frames_to_stabilize: int = 3
+    detect_every_n_frames: int = Field(3, ge=1)
+    predict_every_n_frames: int = Field(3, ge=1)
+    
+    # Re-identification: "histogram" or "embedding" (needs embed_model)
+    reid_method: str = "histogram"
+    embed_threshold: float = 0.5
     
     # Model parameters
     model_mean_values: tuple = (78.4263377603, 87.7689143744, 114.895847746)
@@ -40,9 +57,23 @@ class Settings(BaseSettings):
     # Data storage
     data_file: Path = Path("detections.json")
     
+    # Video I/O: PyAV with hardware decode/encode instead of OpenCV
+    use_hwaccel: bool = False
+    hwaccel_device: str = "cuda"
+    hwaccel_encoder: str = "h264_nvenc"
+    
     # Tracker settings
     max_age: int = 5
     
+    # Number of warm VideoProcessor instances created at API startup. The
+    # video endpoints process synchronously, so one is in use at a time
+    processor_pool_size: int = 1
+    
+    @property
+    def journal_file(self) -> Path:
+        """Append-only log of detections not yet written to data_file."""
+        return self.data_file.with_suffix(".jsonl")
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,16 +1,29 @@
 """Face detection and age/gender prediction module."""
 import cv2
+import threading
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from .config import settings
 
 
 class FaceDetector:
     """Face detector using OpenCV DNN."""
     
+    # Per-channel means of the face detection blob (R, G, B)
+    _face_mean = np.array([104, 117, 123], dtype=np.float32).reshape(3, 1, 1)
+    
     def __init__(self):
         """Initialize face detector."""
         self.conf_threshold = settings.face_conf_threshold
+        
+        # Scratch buffers reused for every face detection blob
+        self._resize_buf = np.empty((300, 300, 3), dtype=np.uint8)
+        self._blob_buf = np.empty((1, 3, 300, 300), dtype=np.float32)
+        
+        # The detector is a shared singleton: the scratch buffers and the
+        # networks' setInput/forward pairs must not interleave across threads
+        self._lock = threading.Lock()
+        
         self._load_models()
     
     def _load_models(self):
@@ -25,6 +38,8 @@ class FaceDetector:
                 settings.gender_proto,
                 settings.gender_model
             ]
+            if settings.reid_method == "embedding":
+                required_files.append(settings.embed_model)
             
             for file_path in required_files:
                 if not file_path.exists():
@@ -44,32 +59,99 @@ class FaceDetector:
                 str(settings.gender_model)
             )
             
-            print("✓ All models loaded successfully")
+            # Face embedding network for re-identification
+            self.embed_net = None
+            if settings.reid_method == "embedding":
+                self.embed_net = cv2.dnn.readNetFromONNX(str(settings.embed_model))
+            
+            backend = self._resolve_backend()
+            for net in (self.face_net, self.age_net, self.gender_net, self.embed_net):
+                if net is not None:
+                    self._configure_backend(net, backend)
+            
+            print(f"✓ All models loaded successfully (backend: {backend})")
             
         except Exception as e:
             raise RuntimeError(f"Failed to load models: {str(e)}")
     
+    @staticmethod
+    def _resolve_backend() -> str:
+        """
+        Resolve the configured DNN backend, probing hardware for "auto".
+        
+        With preload_models the networks are loaded in the gunicorn master,
+        and CUDA initialized there doesn't survive fork() into the workers,
+        so CUDA is neither probed nor used.
+        """
+        backend = settings.dnn_backend.lower()
+        if settings.preload_models and backend.startswith("cuda"):
+            print(f"⚠️  DNN_BACKEND={backend} can't be used with PRELOAD_MODELS; falling back to a CPU backend")
+            backend = "auto"
+        if backend != "auto":
+            return backend
+        
+        if not settings.preload_models:
+            try:
+                if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                    return "cuda_fp16"
+            except (AttributeError, cv2.error):
+                pass
+        
+        try:
+            if cv2.dnn.getAvailableTargets(cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE):
+                return "openvino"
+        except (AttributeError, cv2.error):
+            pass
+        
+        return "cpu"
+    
+    @staticmethod
+    def _configure_backend(net, backend: str):
+        """Set preferable backend and target of a network."""
+        if backend == "cuda":
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+        elif backend == "cuda_fp16":
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA_FP16)
+        elif backend == "openvino":
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        elif backend == "cpu":
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        else:
+            raise ValueError(f"Unknown DNN backend: {backend}")
+    
     def highlight_face(self, frame: np.ndarray) -> Tuple[np.ndarray, List[List[int]]]:
         """
         Detect faces in frame.
         
+        The frame is only read, never modified or copied.
+        
         Args:
             frame: Input frame
             
         Returns:
             Tuple of (frame, list of face boxes)
         """
-        frame_opencv_dnn = frame.copy()
-        frame_height = frame_opencv_dnn.shape[0]
-        frame_width = frame_opencv_dnn.shape[1]
+        frame_height = frame.shape[0]
+        frame_width = frame.shape[1]
         
-        blob = cv2.dnn.blobFromImage(
-            frame_opencv_dnn, 1.0, (300, 300),
-            [104, 117, 123], True, False
-        )
-        
-        self.face_net.setInput(blob)
-        detections = self.face_net.forward()
+        with self._lock:
+            # Same as blobFromImage(frame, 1.0, (300, 300), [104, 117, 123], swapRB=True),
+            # which subtracts the means from the RGB channels in that order,
+            # but written into the preallocated buffers instead of a fresh blob
+            cv2.resize(frame, (300, 300), dst=self._resize_buf)
+            np.subtract(
+                self._resize_buf.transpose(2, 0, 1)[::-1],
+                self._face_mean,
+                out=self._blob_buf[0],
+                dtype=np.float32
+            )
+            
+            self.face_net.setInput(self._blob_buf)
+            detections = self.face_net.forward()
         
         face_boxes = []
         for i in range(detections.shape[2]):
@@ -81,7 +163,7 @@ class FaceDetector:
                 y2 = int(detections[0, 0, i, 6] * frame_height)
                 face_boxes.append([x1, y1, x2, y2])
         
-        return frame_opencv_dnn, face_boxes
+        return frame, face_boxes
     
     def predict_age_gender(self, face: np.ndarray) -> Tuple[str, str]:
         """
@@ -93,26 +175,92 @@ class FaceDetector:
         Returns:
             Tuple of (gender, age)
         """
-        if face.size == 0:
-            return "Unknown", "Unknown"
+        return self.predict_age_gender_batch([face])[0]
+    
+    def predict_age_gender_batch(self, faces: List[np.ndarray]) -> List[Tuple[str, str]]:
+        """
+        Predict age and gender for several face crops at once.
         
-        blob = cv2.dnn.blobFromImage(
-            face, 1.0, (227, 227),
+        All faces go through each network in a single forward pass.
+        
+        Args:
+            faces: List of cropped face images
+            
+        Returns:
+            List of (gender, age) tuples, in the same order as faces
+        """
+        results = [("Unknown", "Unknown")] * len(faces)
+        valid = [i for i, face in enumerate(faces) if face.size > 0]
+        if not valid:
+            return results
+        
+        blob = cv2.dnn.blobFromImages(
+            [faces[i] for i in valid], 1.0, (227, 227),
             settings.model_mean_values,
             swapRB=False
         )
         
-        # Predict gender
-        self.gender_net.setInput(blob)
-        gender_preds = self.gender_net.forward()
-        gender = settings.gender_list[gender_preds[0].argmax()]
+        with self._lock:
+            # Predict gender
+            self.gender_net.setInput(blob)
+            gender_idx = self.gender_net.forward().argmax(axis=1)
+            
+            # Predict age
+            self.age_net.setInput(blob)
+            age_idx = self.age_net.forward().argmax(axis=1)
+        
+        genders = np.take(np.array(settings.gender_list), gender_idx)
+        ages = np.take(np.array(settings.age_list), age_idx)
+        for i, gender, age in zip(valid, genders, ages):
+            results[i] = (str(gender), str(age))
+        
+        return results
+    
+    def embed(self, face: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Compute the face embedding of a face crop.
+        
+        Args:
+            face: Cropped face image
+            
+        Returns:
+            L2-normalized embedding vector, or None for an empty crop
+        """
+        return self.embed_batch([face])[0]
+    
+    def embed_batch(self, faces: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """
+        Compute face embeddings for several face crops in one forward pass.
+        
+        Args:
+            faces: List of cropped face images
+            
+        Returns:
+            List of L2-normalized embedding vectors, None for empty crops
+        """
+        if self.embed_net is None:
+            raise RuntimeError("Face embedding model is not loaded (set REID_METHOD=embedding)")
+        
+        results: List[Optional[np.ndarray]] = [None] * len(faces)
+        valid = [i for i, face in enumerate(faces) if face.size > 0]
+        if not valid:
+            return results
+        
+        # MobileFaceNet input: 112x112 RGB scaled to [-1, 1]
+        blob = cv2.dnn.blobFromImages(
+            [faces[i] for i in valid], 1.0 / 128, (112, 112),
+            (127.5, 127.5, 127.5),
+            swapRB=True
+        )
+        with self._lock:
+            self.embed_net.setInput(blob)
+            embeddings = self.embed_net.forward().reshape(len(valid), -1).astype(np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
         
-        # Predict age
-        self.age_net.setInput(blob)
-        age_preds = self.age_net.forward()
-        age = settings.age_list[age_preds[0].argmax()]
+        for i, embedding in zip(valid, embeddings):
+            results[i] = embedding
         
-        return gender, age
+        return results
 
 
 # Singleton instance
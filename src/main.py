@@ -1,11 +1,12 @@
 """FastAPI application for Gender and Age Detection."""
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import shutil
 import json
-from typing import List
+import orjson
+from typing import Dict, List, Optional, Tuple
 
 from .config import settings
 from .models import (
@@ -16,13 +17,14 @@ from .models import (
     ErrorResponse
 )
 from .detector import get_detector
-from .processor import VideoProcessor
+from .processor import pooled_processor, warm_processor_pool
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="API for detecting gender and age from video streams"
+    description="API for detecting gender and age from video streams",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -37,6 +39,35 @@ app.add_middleware(
 # Global variables
 video_processor = None
 
+# With gunicorn --preload the app module is imported once in the master,
+# so loading the networks here shares their weights copy-on-write with
+# all forked workers instead of every worker reading them from disk
+if settings.preload_models:
+    get_detector()
+
+# Parsed detections file: ((st_mtime_ns, st_size), list, detections by id)
+_detections_cache: Optional[Tuple[Tuple[int, int], list, Dict[int, dict]]] = None
+
+
+def _load_detections() -> Tuple[list, Dict[int, dict]]:
+    """Load detections file, reusing the parsed data while it is unchanged."""
+    global _detections_cache
+    st = settings.data_file.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    if _detections_cache is not None and _detections_cache[0] == key:
+        return _detections_cache[1], _detections_cache[2]
+    
+    data = orjson.loads(settings.data_file.read_bytes())
+    by_id = {d["id"]: d for d in data}
+    _detections_cache = (key, data, by_id)
+    return data, by_id
+
+
+def invalidate_detections_cache():
+    """Drop the cached detections so the next read reloads the file."""
+    global _detections_cache
+    _detections_cache = None
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -44,6 +75,7 @@ async def startup_event():
     try:
         # Load detector (this will load all models)
         detector = get_detector()
+        warm_processor_pool(settings.processor_pool_size)
         print(f"✓ {settings.app_name} started successfully")
     except Exception as e:
         print(f"✗ Failed to start application: {str(e)}")
@@ -105,8 +137,9 @@ async def process_video(
             shutil.copyfileobj(video.file, buffer)
         
         # Process video
-        processor = VideoProcessor()
-        result = processor.process_video(str(video_path))
+        with pooled_processor() as processor:
+            result = processor.process_video(str(video_path))
+        invalidate_detections_cache()
         
         # Clean up uploaded file in background
         background_tasks.add_task(cleanup_file, video_path)
@@ -140,8 +173,9 @@ async def process_video_from_path(request: VideoProcessRequest):
             raise HTTPException(status_code=404, detail="Video file not found")
         
         # Process video
-        processor = VideoProcessor()
-        result = processor.process_video(str(video_path))
+        with pooled_processor() as processor:
+            result = processor.process_video(str(video_path))
+        invalidate_detections_cache()
         
         return VideoProcessResponse(
             status="success",
@@ -164,10 +198,10 @@ async def get_detections():
         if not settings.data_file.exists():
             return []
         
-        with open(settings.data_file, "r") as f:
-            data = json.load(f)
-        
-        return data
+        # The file is written by VideoProcessor in the response shape
+        # already, so skip per-item validation and serialize directly
+        data, _ = _load_detections()
+        return ORJSONResponse(content=data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -180,10 +214,8 @@ async def get_detection(detection_id: int):
         if not settings.data_file.exists():
             raise HTTPException(status_code=404, detail="No detections found")
         
-        with open(settings.data_file, "r") as f:
-            data = json.load(f)
-        
-        detection = next((d for d in data if d["id"] == detection_id), None)
+        _, by_id = _load_detections()
+        detection = by_id.get(detection_id)
         if not detection:
             raise HTTPException(status_code=404, detail="Detection not found")
         
@@ -242,6 +274,8 @@ async def clear_detections():
         if settings.data_file.exists():
             with open(settings.data_file, "w") as f:
                 json.dump([], f)
+            invalidate_detections_cache()
+        settings.journal_file.unlink(missing_ok=True)
         
         # Clear face images
         for image in settings.faces_dir.glob("*.jpg"):
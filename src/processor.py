@@ -1,16 +1,34 @@
 """Video processing utilities."""
 import cv2
-import json
+import orjson
 import os
+import queue
+import threading
 import numpy as np
 from datetime import datetime
 from pathlib import Path
-from collections import deque, Counter
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
 from deep_sort_realtime.deepsort_tracker import DeepSort
 
 from .config import settings
 from .detector import get_detector
+from .video_io import open_video_reader, open_video_writer
+
+# Saved faces per embedding forward pass when loading detections
+_EMBED_CHUNK_SIZE = 64
+
+# BGR color of overlay label text
+_LABEL_COLOR = np.array([0, 255, 255], dtype=np.float32)
+
+
+def _encode_and_write(filename: Path, face: np.ndarray):
+    """Encode a face crop as JPEG and write it to disk."""
+    ok, buf = cv2.imencode(".jpg", face)
+    if not ok:
+        raise RuntimeError(f"Failed to encode face image: {filename}")
+    filename.write_bytes(buf.tobytes())
 
 
 class VideoProcessor:
@@ -19,18 +37,110 @@ class VideoProcessor:
     def __init__(self):
         """Initialize video processor."""
         self.detector = get_detector()
+        # The tracker only steps on detection frames (see _process_frame), so
+        # max_age counts missed detections: every detect_every_n_frames frames
         self.tracker = DeepSort(max_age=settings.max_age)
         self.track_info: Dict[int, Dict[str, Any]] = {}
         self.captured_ids = set()
         self.current_id = 1
         self.detections_data = []
         
+        # Rendered overlay labels keyed by (person_id, gender, age), cleared
+        # on reset so it does not grow across videos
+        self._label_cache: Dict[tuple, tuple] = {}
+        
+        # Label <-> index tables for stabilization votes ("Unknown" is
+        # predicted for empty face crops)
+        self._gender_labels = list(settings.gender_list) + ["Unknown"]
+        self._age_labels = list(settings.age_list) + ["Unknown"]
+        self._gender_index = {label: i for i, label in enumerate(self._gender_labels)}
+        self._age_index = {label: i for i, label in enumerate(self._age_labels)}
+        
+        # Face images are encoded and written off the frame loop
+        self._save_pool = ThreadPoolExecutor(max_workers=2)
+        self._pending_saves: List[Future] = []
+        
+        # Re-identification threshold for the configured signatures
+        if settings.reid_method == "embedding":
+            self._reid_threshold = settings.embed_threshold
+        else:
+            self._reid_threshold = 0.85
+        
+        self._load_detections()
+    
+    @staticmethod
+    def _data_file_stamp() -> Optional[tuple]:
+        """Modification stamp of the detections file, None if missing."""
+        try:
+            st = settings.data_file.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def _load_detections(self):
+        """Load saved detections and their re-identification signatures."""
+        self.detections_data = []
+        self._data_stamp = self._data_file_stamp()
+        
         # Load existing detections if available
         if settings.data_file.exists():
-            with open(settings.data_file, "r") as f:
-                self.detections_data = json.load(f)
-                self.captured_ids = set(entry["id"] for entry in self.detections_data)
-                self.current_id = max(self.captured_ids) + 1 if self.captured_ids else 1
+            self.detections_data = orjson.loads(settings.data_file.read_bytes())
+        
+        # Recover detections journaled by a run that did not finish
+        if settings.journal_file.exists():
+            known_ids = set(entry["id"] for entry in self.detections_data)
+            for line in settings.journal_file.read_bytes().splitlines():
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Partially written last line
+                    continue
+                if entry["id"] not in known_ids:
+                    self.detections_data.append(entry)
+                    known_ids.add(entry["id"])
+        
+        self.captured_ids = set(entry["id"] for entry in self.detections_data)
+        self.current_id = max(self.captured_ids) + 1 if self.captured_ids else 1
+        
+        # Re-identification signatures of saved faces, read from disk once.
+        # Row i of the matrix belongs to person _reid_ids[i], rows past
+        # _reid_count are unused
+        self._reid_matrix: Optional[np.ndarray] = None
+        self._reid_ids = np.empty(64, dtype=np.int64)
+        self._reid_count = 0
+        
+        # Decoded faces are signed in chunks so memory doesn't grow with the
+        # history; embeddings batch well, histograms are computed as read
+        chunk_size = _EMBED_CHUNK_SIZE if settings.reid_method == "embedding" else 1
+        saved_ids = []
+        saved_faces = []
+        for detection in self.detections_data:
+            saved_face_path = detection["image"]
+            if not Path(saved_face_path).exists():
+                continue
+            
+            # Histograms only need luminance, which the JPEG decoder
+            # can produce directly
+            if settings.reid_method == "embedding":
+                saved_face = cv2.imread(str(saved_face_path))
+            else:
+                saved_face = cv2.imread(str(saved_face_path), cv2.IMREAD_GRAYSCALE)
+            if saved_face is None:
+                continue
+            
+            saved_ids.append(detection["id"])
+            saved_faces.append(saved_face)
+            if len(saved_faces) == chunk_size:
+                self._add_saved_faces(saved_ids, saved_faces)
+                saved_ids, saved_faces = [], []
+        
+        self._add_saved_faces(saved_ids, saved_faces)
+    
+    def _add_saved_faces(self, person_ids: List[int], faces: List[np.ndarray]):
+        """Add the signatures of saved faces to the re-identification matrix."""
+        for person_id, signature in zip(person_ids, self._face_signatures(faces)):
+            if signature is not None:
+                self._add_signature(person_id, signature)
     
     def process_video(self, video_path: str, output_name: str = "output_video.mp4") -> Dict[str, Any]:
         """
@@ -43,42 +153,76 @@ class VideoProcessor:
         Returns:
             Dictionary with processing results
         """
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise RuntimeError(f"Cannot open video: {video_path}")
+        cap = open_video_reader(video_path)
         
         # Setup video writer
         output_path = settings.output_dir / output_name
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+        fps = cap.fps
+        out = open_video_writer(str(output_path), fps, cap.width, cap.height)
         
         frame_count = 0
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        total_frames = cap.frame_count
         
         print(f"Processing video: {total_frames} frames at {fps} FPS")
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("Finished processing video")
-                break
-            
-            frame_count += 1
-            result_img = self._process_frame(frame)
-            out.write(result_img)
-            
-            if frame_count % 30 == 0:
-                print(f"Processed {frame_count}/{total_frames} frames...")
+        # Decode and encode in background threads so they overlap with
+        # inference; the bounded queues keep memory use in check. Exceptions
+        # raised in the threads are collected in errors and re-raised here
+        frames_queue = queue.Queue(maxsize=4)
+        results_queue = queue.Queue(maxsize=4)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        reader = threading.Thread(
+            target=self._read_frames, args=(cap, frames_queue, stop, errors), daemon=True
+        )
+        writer = threading.Thread(
+            target=self._write_frames, args=(out, results_queue, errors), daemon=True
+        )
+        reader.start()
+        writer.start()
+        
+        def put_result(item) -> bool:
+            """Queue an item for the writer, giving up if the writer died."""
+            while writer.is_alive():
+                try:
+                    results_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        try:
+            while True:
+                frame = frames_queue.get()
+                if frame is None:
+                    break
+                
+                frame_count += 1
+                result_img = self._process_frame(frame, frame_count - 1)
+                if not put_result(result_img):
+                    break
+                
+                if frame_count % 30 == 0:
+                    print(f"Processed {frame_count}/{total_frames} frames...")
+        finally:
+            stop.set()
+            put_result(None)
+            reader.join()
+            writer.join()
+            cap.release()
+            out.release()
+            self._wait_for_saves()
         
-        cap.release()
-        out.release()
+        if errors:
+            raise errors[0]
+        print("Finished processing video")
         
-        # Save detections
-        with open(settings.data_file, "w") as f:
-            json.dump(self.detections_data, f, indent=4)
+        # Save detections; the snapshot now contains everything journaled
+        settings.data_file.write_bytes(
+            orjson.dumps(self.detections_data, option=orjson.OPT_INDENT_2)
+        )
+        settings.journal_file.unlink(missing_ok=True)
+        self._data_stamp = self._data_file_stamp()
         
         return {
             "output_video": str(output_path),
@@ -87,156 +231,401 @@ class VideoProcessor:
             "detections": self.detections_data
         }
     
-    def _process_frame(self, frame):
-        """Process a single frame."""
-        result_img, face_boxes = self.detector.highlight_face(frame)
+    @staticmethod
+    def _read_frames(cap, frames_queue: queue.Queue, stop: threading.Event,
+                     errors: List[BaseException]):
+        """Decode frames into the queue, ending with None."""
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    frames_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
         
-        # Prepare detections for tracker
-        detections_for_tracker = [
-            [(x1, y1, x2-x1, y2-y1), 1.0, "face"]
-            for x1, y1, x2, y2 in face_boxes
-        ]
-        
-        # Update tracker
-        tracks = self.tracker.update_tracks(detections_for_tracker, frame=frame)
+        try:
+            while True:
+                frame = cap.read()
+                if frame is None or not put(frame):
+                    break
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put(None)
+    
+    @staticmethod
+    def _write_frames(out, results_queue: queue.Queue, errors: List[BaseException]):
+        """Encode processed frames from the queue until None is received."""
+        try:
+            while True:
+                result_img = results_queue.get()
+                if result_img is None:
+                    break
+                out.write(result_img)
+        except BaseException as e:
+            errors.append(e)
+    
+    def _process_frame(self, frame, frame_index: int = 0):
+        """
+        Process a single frame.
         
-        for track in tracks:
-            if not track.is_confirmed():
-                continue
+        Faces are detected every settings.detect_every_n_frames frames; in
+        between, track boxes are extrapolated from the Kalman filter's
+        velocity. Age and gender of known tracks are re-predicted every
+        settings.predict_every_n_frames frames.
+        """
+        detect_every = settings.detect_every_n_frames
+        if frame_index % detect_every == 0:
+            result_img, face_boxes = self.detector.highlight_face(frame)
+            
+            # Prepare detections for tracker
+            detections_for_tracker = [
+                [(x1, y1, x2-x1, y2-y1), 1.0, "face"]
+                for x1, y1, x2, y2 in face_boxes
+            ]
             
-            track_id = track.track_id
-            ltrb = track.to_ltrb()
-            x1, y1, x2, y2 = map(int, ltrb)
+            # Update tracker
+            tracks = self.tracker.update_tracks(detections_for_tracker, frame=frame)
+        else:
+            # The tracker is not stepped between detections: DeepSort's IoU
+            # matching only considers tracks with time_since_update == 1, so
+            # extra predict steps would keep tentative tracks from ever
+            # being confirmed
+            result_img = frame
+            tracks = self.tracker.tracker.tracks
+        
+        track_info = self.track_info
+        
+        # Padded boxes of confirmed tracks, computed for all tracks at once
+        confirmed = [track for track in tracks if track.is_confirmed()]
+        boxes = []
+        if confirmed:
+            pad = settings.padding
+            # Kalman state is (x, y, aspect, height) and its velocity per
+            # tracker step; advance it by the fraction of a step since the
+            # last detection frame (zero on detection frames, like to_ltrb())
+            state = np.array([track.mean[:8] for track in confirmed])
+            xyah = state[:, :4] + (frame_index % detect_every) / detect_every * state[:, 4:]
+            half_w = xyah[:, 2] * xyah[:, 3] / 2
+            half_h = xyah[:, 3] / 2
+            ltrb = np.stack([
+                xyah[:, 0] - half_w, xyah[:, 1] - half_h,
+                xyah[:, 0] + half_w, xyah[:, 1] + half_h
+            ], axis=1).astype(np.int32)
+            size = ltrb[:, 2:] - ltrb[:, :2]
             
             # Apply padding
-            box_width = x2 - x1
-            box_height = y2 - y1
-            x1 = max(0, x1 - settings.padding)
-            y1 = max(0, y1 - settings.padding)
-            x2 = min(frame.shape[1]-1, x1 + box_width + 2*settings.padding)
-            y2 = min(frame.shape[0]-1, y1 + box_height + 2*settings.padding)
+            ltrb[:, :2] -= pad
+            np.maximum(ltrb[:, :2], 0, out=ltrb[:, :2])
+            ltrb[:, 2:] = ltrb[:, :2] + size + 2 * pad
+            np.minimum(ltrb[:, 2:], (frame.shape[1] - 1, frame.shape[0] - 1), out=ltrb[:, 2:])
             
-            if track_id not in self.track_info:
+            boxes = [
+                (track.track_id, *box)
+                for track, box in zip(confirmed, ltrb.tolist())
+            ]
+        
+        # Predict age and gender in one batch, for new tracks always and
+        # for known tracks only on prediction frames
+        predict_all = frame_index % settings.predict_every_n_frames == 0
+        to_predict = [
+            i for i, (track_id, *_) in enumerate(boxes)
+            if predict_all or track_id not in track_info
+        ]
+        faces = [frame[y1:y2, x1:x2] for _, x1, y1, x2, y2 in (boxes[i] for i in to_predict)]
+        predictions = dict(zip(to_predict, self.detector.predict_age_gender_batch(faces)))
+        
+        # Boxes and labels are drawn after all faces are cropped, since
+        # result_img is the frame itself and not a copy
+        overlays = []
+        for i, (track_id, x1, y1, x2, y2) in enumerate(boxes):
+            info = track_info.get(track_id)
+            if info is None:
                 # New person detected
-                self._handle_new_track(track_id, frame, x1, y1, x2, y2)
-            else:
+                self._handle_new_track(track_id, frame, x1, y1, x2, y2, *predictions[i])
+                info = track_info[track_id]
+            elif i in predictions:
                 # Update existing track
-                self._update_track(track_id, frame, x1, y1, x2, y2)
+                self._update_track(track_id, x1, y1, x2, y2, *predictions[i])
+            else:
+                info["box"] = [x1, y1, x2, y2]
             
             # Draw bounding box and label
-            label = (f'ID:{self.track_info[track_id]["person_id"]} '
-                    f'{self.track_info[track_id]["gender"]} '
-                    f'{self.track_info[track_id]["age"]}')
+            overlays.append((x1, y1, x2, y2, (info["person_id"], info["gender"], info["age"])))
+        
+        for x1, y1, x2, y2, key in overlays:
             cv2.rectangle(result_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(result_img, label, (x1, y1-10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA)
+            self._draw_label(result_img, key, x1, y1-10)
         
         return result_img
     
-    def _handle_new_track(self, track_id: int, frame, x1: int, y1: int, x2: int, y2: int):
+    def _draw_label(self, img: np.ndarray, key: tuple, x: int, y: int):
+        """
+        Draw a track label with its text baseline starting at (x, y).
+        
+        The text is rasterized once per (person_id, gender, age) and then
+        alpha-blended from the cache, since labels rarely change. The uint8
+        blend runs over 10x faster than cv2.putText for a typical label.
+        """
+        sprite = self._label_cache.get(key)
+        if sprite is None:
+            person_id, gender, age = key
+            sprite = self._render_label(f'ID:{person_id} {gender} {age}')
+            self._label_cache[key] = sprite
+        text, inv_alpha, (origin_x, origin_y) = sprite
+        
+        # Clip sprite to the image
+        h, w = inv_alpha.shape[:2]
+        left, top = x - origin_x, y - origin_y
+        sx0, sy0 = max(0, -left), max(0, -top)
+        sx1, sy1 = min(w, img.shape[1] - left), min(h, img.shape[0] - top)
+        if sx0 >= sx1 or sy0 >= sy1:
+            return
+        
+        roi = img[top+sy0:top+sy1, left+sx0:left+sx1]
+        cv2.multiply(roi, inv_alpha[sy0:sy1, sx0:sx1], dst=roi, scale=1 / 255)
+        cv2.add(roi, text[sy0:sy1, sx0:sx1], dst=roi)
+    
+    @staticmethod
+    def _render_label(label: str):
+        """
+        Rasterize label text for blending.
+        
+        Returns the text premultiplied by its alpha, the inverse alpha (both
+        uint8 BGR) and the text origin within the sprite.
+        """
+        font, scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2
+        (text_w, text_h), baseline = cv2.getTextSize(label, font, scale, thickness)
+        
+        # Glyphs such as "(" reach past the reported text size, so draw on a
+        # generous canvas and crop it to the ink
+        margin = text_h
+        canvas = np.zeros((text_h + baseline + 2 * margin, text_w + 2 * margin), dtype=np.uint8)
+        cv2.putText(canvas, label, (margin, text_h + margin), font, scale, 255, thickness, cv2.LINE_AA)
+        x, y, w, h = cv2.boundingRect(canvas)
+        origin = (margin - x, text_h + margin - y)
+        
+        alpha = canvas[y:y+h, x:x+w, None]
+        text = np.rint(alpha * (_LABEL_COLOR / 255.0)).astype(np.uint8)
+        inv_alpha = np.repeat(255 - alpha, 3, axis=2)
+        return text, inv_alpha, origin
+    
+    def _handle_new_track(self, track_id: int, frame, x1: int, y1: int, x2: int, y2: int,
+                          gender: str, age: str):
         """Handle new tracked person."""
         face = frame[y1:y2, x1:x2]
-        gender, age = self.detector.predict_age_gender(face)
         
         # Check if this person was already captured by comparing existing saved faces
-        person_id = self._find_matching_person(face)
+        signature = self._face_signatures([face])[0]
+        person_id = self._find_matching_person(signature)
         
         if person_id is None:
             # New unique person - save face image
             person_id = self.current_id
             entry_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             filename = settings.faces_dir / f"person_{person_id}.jpg"
-            cv2.imwrite(str(filename), face)
+            self._pending_saves.append(
+                self._save_pool.submit(_encode_and_write, filename, face.copy())
+            )
+            
+            if signature is not None:
+                self._add_signature(person_id, signature)
             
             # Save detection data
-            self.detections_data.append({
+            entry = {
                 "id": person_id,
                 "image": str(filename),
                 "gender": gender,
                 "age": age,
                 "entry_time": entry_time
-            })
+            }
+            self.detections_data.append(entry)
+            
+            # Journal it right away so a crash doesn't lose it
+            with open(settings.journal_file, "ab") as f:
+                f.write(orjson.dumps(entry) + b"\n")
             
             print(f"[✔] Captured Person {person_id}: Gender={gender}, Age={age}, Entry={entry_time}")
             self.current_id += 1
         
-        # Initialize deques for stabilization
-        gender_deque = deque([gender], maxlen=settings.frames_to_stabilize)
-        age_deque = deque([age], maxlen=settings.frames_to_stabilize)
-        
-        # Update tracking info
+        # Update tracking info; the last frames_to_stabilize predictions are
+        # kept as label indices in a ring buffer with a running histogram
+        window = settings.frames_to_stabilize
         self.captured_ids.add(track_id)
         self.track_info[track_id] = {
             "box": [x1, y1, x2, y2],
-            "gender_deque": gender_deque,
-            "age_deque": age_deque,
+            "gender_ring": np.empty(window, dtype=np.int8),
+            "gender_hist": np.zeros(len(self._gender_labels), dtype=np.int16),
+            "age_ring": np.empty(window, dtype=np.int8),
+            "age_hist": np.zeros(len(self._age_labels), dtype=np.int16),
+            "vote_pos": 0,
+            "vote_count": 0,
             "gender": gender,
             "age": age,
             "person_id": person_id
         }
+        self._add_votes(self.track_info[track_id], gender, age)
     
-    def _update_track(self, track_id: int, frame, x1: int, y1: int, x2: int, y2: int):
+    def _update_track(self, track_id: int, x1: int, y1: int, x2: int, y2: int,
+                      gender: str, age: str):
         """Update existing track with new predictions."""
         self.track_info[track_id]["box"] = [x1, y1, x2, y2]
-        face = frame[y1:y2, x1:x2]
-        gender, age = self.detector.predict_age_gender(face)
-        
-        # Update deques
-        self.track_info[track_id]["gender_deque"].append(gender)
-        self.track_info[track_id]["age_deque"].append(age)
         
         # Get most common values for stabilization
-        self.track_info[track_id]["gender"] = Counter(
-            self.track_info[track_id]["gender_deque"]
-        ).most_common(1)[0][0]
-        self.track_info[track_id]["age"] = Counter(
-            self.track_info[track_id]["age_deque"]
-        ).most_common(1)[0][0]
+        info = self.track_info[track_id]
+        self._add_votes(info, gender, age)
+        info["gender"] = self._gender_labels[self._majority(info, "gender")]
+        info["age"] = self._age_labels[self._majority(info, "age")]
+    
+    def _add_votes(self, info: Dict[str, Any], gender: str, age: str):
+        """Push a prediction into a track's ring buffers, evicting the oldest."""
+        pos = info["vote_pos"]
+        full = info["vote_count"] == settings.frames_to_stabilize
+        for ring, hist, idx in (
+            (info["gender_ring"], info["gender_hist"], self._gender_index[gender]),
+            (info["age_ring"], info["age_hist"], self._age_index[age]),
+        ):
+            if full:
+                hist[ring[pos]] -= 1
+            ring[pos] = idx
+            hist[idx] += 1
+        
+        info["vote_pos"] = (pos + 1) % settings.frames_to_stabilize
+        info["vote_count"] = min(info["vote_count"] + 1, settings.frames_to_stabilize)
     
-    def _find_matching_person(self, face: np.ndarray) -> int:
+    @staticmethod
+    def _majority(info: Dict[str, Any], key: str) -> int:
         """
-        Find if this face matches any previously saved person.
-        Returns person_id if match found, None otherwise.
-        Uses simple face comparison based on histogram similarity.
+        Most voted label index in a track's window.
+        
+        Ties go to the label whose vote is oldest in the window, matching
+        Counter.most_common over the previous deque of predictions.
         """
-        if len(self.detections_data) == 0:
-            return None
+        hist = info[f"{key}_hist"]
+        best = hist.argmax()
+        if np.count_nonzero(hist == hist[best]) == 1:
+            return int(best)
+        ring = info[f"{key}_ring"]
+        count = info["vote_count"]
+        # Oldest vote sits at vote_pos once the ring is full, at 0 before that
+        start = info["vote_pos"] if count == len(ring) else 0
+        window = np.roll(ring[:count], -start)
+        return int(window[np.argmax(hist[window] == hist[best])])
+    
+    @staticmethod
+    def _face_histogram(face: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Compute the grayscale histogram used for face matching.
         
-        # Resize face for comparison
+        Accepts BGR or grayscale faces. The histogram is zero-mean and
+        unit-norm, so the dot product of two of them equals cv2.compareHist
+        with HISTCMP_CORREL.
+        """
         try:
-            face_resized = cv2.resize(face, (100, 100))
-            face_gray = cv2.cvtColor(face_resized, cv2.COLOR_BGR2GRAY)
-        except:
+            # Convert first so the resize only touches one channel
+            if face.ndim == 3:
+                face = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+            face_gray = cv2.resize(face, (100, 100), interpolation=cv2.INTER_AREA)
+        except cv2.error:
             return None
         
-        # Compare with all saved faces
-        for detection in self.detections_data:
-            saved_face_path = detection["image"]
-            if not Path(saved_face_path).exists():
-                continue
-            
-            saved_face = cv2.imread(str(saved_face_path))
-            if saved_face is None:
-                continue
-            
-            try:
-                saved_face_resized = cv2.resize(saved_face, (100, 100))
-                saved_face_gray = cv2.cvtColor(saved_face_resized, cv2.COLOR_BGR2GRAY)
-                
-                # Calculate histogram similarity
-                hist1 = cv2.calcHist([face_gray], [0], None, [256], [0, 256])
-                hist2 = cv2.calcHist([saved_face_gray], [0], None, [256], [0, 256])
-                similarity = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
-                
-                # If similarity is high enough, consider it the same person
-                if similarity > 0.85:  # Threshold can be adjusted
-                    return detection["id"]
-            except:
-                continue
+        hist = cv2.calcHist([face_gray], [0], None, [256], [0, 256]).flatten()
+        hist -= hist.mean()
+        norm = np.linalg.norm(hist)
+        if norm == 0:
+            return None
+        return (hist / norm).astype(np.float32)
+    
+    def _face_signatures(self, faces: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """Compute unit-norm re-identification vectors for face crops."""
+        if not faces:
+            return []
+        if settings.reid_method == "embedding":
+            return self.detector.embed_batch(faces)
+        return [self._face_histogram(face) for face in faces]
+    
+    def _add_signature(self, person_id: int, signature: np.ndarray):
+        """Append a saved face signature, growing the matrix when full."""
+        if self._reid_matrix is None:
+            self._reid_matrix = np.empty((len(self._reid_ids), signature.shape[0]), dtype=np.float32)
+        elif self._reid_count == len(self._reid_ids):
+            capacity = 2 * len(self._reid_ids)
+            self._reid_matrix = np.resize(self._reid_matrix, (capacity, signature.shape[0]))
+            self._reid_ids = np.resize(self._reid_ids, capacity)
+        
+        self._reid_matrix[self._reid_count] = signature
+        self._reid_ids[self._reid_count] = person_id
+        self._reid_count += 1
+    
+    def _find_matching_person(self, signature: Optional[np.ndarray]) -> Optional[int]:
+        """
+        Find if a face signature matches any previously saved person.
+        Returns person_id if match found, None otherwise.
+        Signatures are face embeddings or histograms depending on settings.reid_method.
+        """
+        if signature is None or self._reid_count == 0:
+            return None
+        
+        # Similarity with all saved faces at once
+        similarities = self._reid_matrix[:self._reid_count] @ signature
+        best = int(similarities.argmax())
+        
+        # If similarity is high enough, consider it the same person
+        if similarities[best] > self._reid_threshold:
+            return int(self._reid_ids[best])
         
         return None
     
+    def _wait_for_saves(self):
+        """Wait until all queued face images are written."""
+        pending, self._pending_saves = self._pending_saves, []
+        for future in pending:
+            future.result()
+    
     def reset(self):
-        """Reset processor state."""
-        self.tracker = DeepSort(max_age=settings.max_age)
+        """
+        Reset processor state for a new video, keeping loaded models.
+        
+        Saved detections are reloaded only if the detections file was
+        changed by someone else since this processor last read or wrote it.
+        """
+        self.tracker.delete_all_tracks()
         self.track_info = {}
+        self._label_cache.clear()
+        
+        if self._data_stamp != self._data_file_stamp() or settings.journal_file.exists():
+            self._load_detections()
+        else:
+            self.captured_ids = set(entry["id"] for entry in self.detections_data)
+            self.current_id = max(self.captured_ids) + 1 if self.captured_ids else 1
+
+
+# Warm processors shared by API requests. LIFO hands out the most recently
+# used processor, whose detections are most likely still current on disk
+_processor_pool: "queue.LifoQueue[VideoProcessor]" = queue.LifoQueue()
+
+
+def warm_processor_pool(size: int):
+    """Create processors until the pool holds at least size of them."""
+    while _processor_pool.qsize() < size:
+        _processor_pool.put(VideoProcessor())
+
+
+@contextmanager
+def pooled_processor() -> Iterator[VideoProcessor]:
+    """
+    Check out a processor from the pool, returning it when done.
+    
+    A new processor is created if none is idle.
+    """
+    try:
+        processor = _processor_pool.get_nowait()
+        processor.reset()
+    except queue.Empty:
+        processor = VideoProcessor()
+    
+    try:
+        yield processor
+    finally:
+        _processor_pool.put(processor)
@@ -0,0 +1,140 @@
+"""Video decoding and encoding backends."""
+from fractions import Fraction
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .config import settings
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+class OpenCVVideoReader:
+    """Read frames with cv2.VideoCapture (software decode)."""
+    
+    def __init__(self, video_path: str):
+        """Open video file."""
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open video: {video_path}")
+        
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    def read(self) -> Optional[np.ndarray]:
+        """Return the next BGR frame, or None at the end of the video."""
+        ret, frame = self.cap.read()
+        return frame if ret else None
+    
+    def release(self):
+        """Close video file."""
+        self.cap.release()
+
+
+class OpenCVVideoWriter:
+    """Write frames with cv2.VideoWriter (mp4v)."""
+    
+    def __init__(self, output_path: str, fps: float, width: int, height: int):
+        """Create output video file."""
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    
+    def write(self, frame: np.ndarray):
+        """Encode a BGR frame."""
+        self.out.write(frame)
+    
+    def release(self):
+        """Finish and close output video file."""
+        self.out.release()
+
+
+class PyAVVideoReader:
+    """Read frames with PyAV using hardware-accelerated decoding."""
+    
+    def __init__(self, video_path: str):
+        """Open video file."""
+        try:
+            self.container = av.open(video_path, **self._hwaccel_options())
+        except av.FFmpegError as e:
+            raise RuntimeError(f"Cannot open video: {video_path} ({e})")
+        
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.fps = float(self.stream.average_rate or 0)
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+        self.frame_count = self.stream.frames
+        self._frames = self.container.decode(self.stream)
+    
+    @staticmethod
+    def _hwaccel_options() -> dict:
+        """Hardware decoding options supported by the installed PyAV."""
+        try:
+            from av.codec.hwaccel import HWAccel
+        except ImportError:
+            # Older PyAV without hwaccel support decodes in software
+            return {}
+        return {"hwaccel": HWAccel(device_type=settings.hwaccel_device, allow_software_fallback=True)}
+    
+    def read(self) -> Optional[np.ndarray]:
+        """Return the next BGR frame, or None at the end of the video."""
+        frame = next(self._frames, None)
+        return frame.to_ndarray(format="bgr24") if frame is not None else None
+    
+    def release(self):
+        """Close video file."""
+        self.container.close()
+
+
+class PyAVVideoWriter:
+    """Write frames with PyAV using a hardware encoder."""
+    
+    def __init__(self, output_path: str, fps: float, width: int, height: int):
+        """Create output video file."""
+        rate = Fraction(fps).limit_denominator(1001) if fps > 0 else Fraction(30)
+        self.container = av.open(output_path, "w")
+        self.stream = self.container.add_stream(settings.hwaccel_encoder, rate=rate)
+        self.stream.width = width
+        self.stream.height = height
+        self.stream.pix_fmt = "yuv420p"
+    
+    def write(self, frame: np.ndarray):
+        """Encode a BGR frame."""
+        video_frame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+    
+    def release(self):
+        """Flush the encoder and close output video file."""
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+
+
+def _use_pyav() -> bool:
+    """Check whether hardware-accelerated video I/O is enabled."""
+    if not settings.use_hwaccel:
+        return False
+    if av is None:
+        raise RuntimeError("USE_HWACCEL requires PyAV: pip install av")
+    return True
+
+
+def open_video_reader(video_path: str):
+    """Open a video for reading with the configured backend."""
+    if _use_pyav():
+        return PyAVVideoReader(video_path)
+    return OpenCVVideoReader(video_path)
+
+
+def open_video_writer(output_path: str, fps: float, width: int, height: int):
+    """Create an output video with the configured backend."""
+    if _use_pyav():
+        return PyAVVideoWriter(output_path, fps, width, height)
+    return OpenCVVideoWriter(output_path, fps, width, height)